@@ -8,20 +8,43 @@ import subprocess
 import sys
 import os
 
+VERIFY_MODULES = [
+    ("tensorflow", "TensorFlow"),
+    ("h5py", "h5py"),
+    ("numpy", "NumPy"),
+    ("tf2onnx", "tf2onnx"),
+    ("onnx", "ONNX"),
+    ("google.protobuf", "protobuf"),
+]
+
+# Imported in a single interpreter so heavy packages (TensorFlow) only load once
+VERIFY_SCRIPT = """
+import importlib
+for module, name in %r:
+    try:
+        mod = importlib.import_module(module)
+        print(f"[OK] {name} {getattr(mod, '__version__', 'unknown')}")
+    except Exception as e:
+        print(f"[MISSING] {name}: {e}")
+""" % (VERIFY_MODULES,)
+
 def run_command(cmd, description):
-    """Run a command and handle errors"""
+    """Run a command (argument list, no shell) and handle errors.
+
+    Returns the completed process on success, None on failure.
+    """
     print(f"[INFO] {description}...")
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=True)
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
         print(f"[SUCCESS] {description}")
-        return True
-    except subprocess.CalledProcessError as e:
+        return result
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"[ERROR] {description} failed: {e}")
-        if e.stdout:
+        if getattr(e, 'stdout', None):
             print(f"Output: {e.stdout}")
-        if e.stderr:
+        if getattr(e, 'stderr', None):
             print(f"Error: {e.stderr}")
-        return False
+        return None
 
 def fix_dependencies():
     """Fix dependency conflicts for conversion"""
@@ -31,7 +54,7 @@ def fix_dependencies():
 
     # Check current environment
     print("\n[INFO] Checking current Python environment...")
-    run_command("python --version", "Python version check")
+    run_command([sys.executable, "--version"], "Python version check")
 
     # Install compatible versions for Python 3.12
     print("\n[INFO] Installing Python 3.12 compatible packages...")
@@ -47,36 +70,34 @@ def fix_dependencies():
         ("tqdm", "tqdm for progress bars")
     ]
 
-    success_count = 0
+    # One pip run resolves the whole set instead of re-resolving per package
     for package, description in packages_to_install:
-        if run_command(f"pip install {package}", f"Install {description}"):
-            success_count += 1
+        print(f"  - {description}")
+    install_cmd = [sys.executable, "-m", "pip", "install", *(package for package, _ in packages_to_install)]
+    if run_command(install_cmd, f"Install {len(packages_to_install)} packages"):
+        success_count = len(packages_to_install)
+    else:
+        success_count = 0
 
     print(f"\n[INFO] Successfully installed {success_count}/{len(packages_to_install)} packages")
 
     # Verify installations
     print("\n[INFO] Verifying package installations...")
 
-    verification_commands = [
-        ("python -c \"import tensorflow; print(f'TensorFlow {tensorflow.__version__}')\" 2>nul", "TensorFlow"),
-        ("python -c \"import h5py; print(f'h5py {h5py.__version__}')\" 2>nul", "h5py"),
-        ("python -c \"import numpy; print(f'NumPy {numpy.__version__}')\" 2>nul", "NumPy"),
-        ("python -c \"import tf2onnx; print(f'tf2onnx {tf2onnx.__version__}')\" 2>nul", "tf2onnx"),
-        ("python -c \"import onnx; print(f'ONNX {onnx.__version__}')\" 2>nul", "ONNX"),
-        ("python -c \"import protobuf; print(f'protobuf {protobuf.__version__}')\" 2>nul", "protobuf")
-    ]
-
     verified_count = 0
-    for cmd, name in verification_commands:
-        if run_command(cmd, f"Verify {name}"):
-            verified_count += 1
+    result = run_command([sys.executable, "-c", VERIFY_SCRIPT], "Verify packages")
+    if result:
+        for line in result.stdout.splitlines():
+            print(f"  {line}")
+            if line.startswith("[OK]"):
+                verified_count += 1
 
-    print(f"\n[INFO] Verified {verified_count}/{len(verification_commands)} packages")
+    print(f"\n[INFO] Verified {verified_count}/{len(VERIFY_MODULES)} packages")
 
     # Test model loading
     if os.path.exists("best_model.h5"):
         print("\n[INFO] Testing model loading...")
-        test_cmd = '''python -c "import tensorflow as tf; model = tf.keras.models.load_model('best_model.h5'); print(f'Model loaded successfully! Parameters: {model.count_params():,}')"'''
+        test_cmd = [sys.executable, "-c", "import tensorflow as tf; model = tf.keras.models.load_model('best_model.h5'); print(f'Model loaded successfully! Parameters: {model.count_params():,}')"]
         if run_command(test_cmd, "Model loading test"):
             print("[SUCCESS] Model can be loaded successfully")
         else:
@@ -10,6 +10,10 @@ import struct
 import json
 import numpy as np
 
+# Precompiled little-endian packers for GGUF fields
+U32 = struct.Struct('<I')
+U64 = struct.Struct('<Q')
+
 def check_dependencies():
     """Check if required dependencies are available"""
     missing = []
@@ -41,53 +45,101 @@ def check_dependencies():
 
     return True
 
+def model_info_from_h5(f, config):
+    """Build model info from the saved Keras config and weight datasets.
+
+    Returns None when the config does not describe input/output shapes,
+    in which case the caller falls back to loading the model with Keras.
+    """
+    import h5py
+
+    layers = config.get('config', {})
+    if isinstance(layers, dict):
+        layers = layers.get('layers', [])
+    if not layers:
+        return None
+
+    first = layers[0].get('config', {})
+    last = layers[-1].get('config', {})
+    input_shape = first.get('batch_input_shape') or first.get('batch_shape')
+    units = last.get('units')
+    if input_shape is None or units is None:
+        return None
+
+    # Parameter count is the total size of the stored model weights
+    weights_root = f['model_weights'] if 'model_weights' in f else f
+    sizes = []
+    weights_root.visititems(
+        lambda name, obj: sizes.append(obj.size) if isinstance(obj, h5py.Dataset) else None
+    )
+
+    dtype = first.get('dtype', 'float32')
+    if isinstance(dtype, dict):
+        dtype = dtype.get('config', {}).get('name', 'float32')
+
+    return {
+        'architecture': 'MobileNetV2-based plant classifier',
+        'input_shape': list(input_shape),
+        'output_shape': [None, units],
+        'num_classes': units,
+        'total_params': int(sum(sizes)),
+        'layers': len(layers),
+        'dtype': str(dtype)
+    }
+
 def extract_model_info_safe(model_path):
     """Extract model information without full loading"""
     try:
         import h5py
-        import tensorflow as tf
 
         print(f"[INFO] Extracting model info from {model_path}")
 
         # Use h5py to read model metadata without full Keras loading
+        info = None
         with h5py.File(model_path, 'r') as f:
             # Try to get basic model info
             if 'model_config' in f.attrs:
                 config = json.loads(f.attrs['model_config'])
                 print(f"[INFO] Model config found")
+                info = model_info_from_h5(f, config)
             else:
                 print(f"[WARNING] No model config found, using defaults")
                 config = {'class_name': 'Functional'}
 
-        # Try loading with custom objects to bypass Keras issues
-        try:
-            model = tf.keras.models.load_model(model_path, compile=False)
-            print(f"[OK] Model loaded successfully")
-
-            info = {
-                'architecture': 'MobileNetV2-based plant classifier',
-                'input_shape': list(model.input_shape),
-                'output_shape': list(model.output_shape),
-                'num_classes': model.output_shape[-1] if len(model.output_shape) > 1 else None,
-                'total_params': int(model.count_params()),
-                'layers': len(model.layers),
-                'dtype': str(model.dtype)
-            }
-
-        except Exception as e:
-            print(f"[WARNING] Could not load model normally: {e}")
-            print(f"[INFO] Using fallback model information")
-
-            # Fallback info based on typical plant classification model
-            info = {
-                'architecture': 'MobileNetV2-based plant classifier',
-                'input_shape': [None, 224, 224, 3],  # Standard MobileNetV2 input
-                'output_shape': [None, 10],  # Assume 10 classes
-                'num_classes': 10,
-                'total_params': 2257984,  # Approximate for MobileNetV2
-                'layers': 155,
-                'dtype': 'float32'
-            }
+        if info is not None:
+            print(f"[OK] Model info read from H5 config (Keras load skipped)")
+        else:
+            # Only build the Keras graph when the config alone is not enough
+            try:
+                import tensorflow as tf
+
+                model = tf.keras.models.load_model(model_path, compile=False)
+                print(f"[OK] Model loaded successfully")
+
+                info = {
+                    'architecture': 'MobileNetV2-based plant classifier',
+                    'input_shape': list(model.input_shape),
+                    'output_shape': list(model.output_shape),
+                    'num_classes': model.output_shape[-1] if len(model.output_shape) > 1 else None,
+                    'total_params': int(model.count_params()),
+                    'layers': len(model.layers),
+                    'dtype': str(model.dtype)
+                }
+
+            except Exception as e:
+                print(f"[WARNING] Could not load model normally: {e}")
+                print(f"[INFO] Using fallback model information")
+
+                # Fallback info based on typical plant classification model
+                info = {
+                    'architecture': 'MobileNetV2-based plant classifier',
+                    'input_shape': [None, 224, 224, 3],  # Standard MobileNetV2 input
+                    'output_shape': [None, 10],  # Assume 10 classes
+                    'num_classes': 10,
+                    'total_params': 2257984,  # Approximate for MobileNetV2
+                    'layers': 155,
+                    'dtype': 'float32'
+                }
 
         # Save to JSON
         with open('model_info.json', 'w') as f:
@@ -112,19 +164,23 @@ def extract_weights_from_h5(model_path):
         import h5py
 
         weights = []
-        layer_names = []
+        datasets = []
 
         with h5py.File(model_path, 'r') as f:
-            def traverse_weights(name, obj):
-                if isinstance(obj, h5py.Dataset) and 'kernel' in name or 'bias' in name:
-                    weights.append({
-                        'name': name,
-                        'shape': obj.shape,
-                        'data': obj[()].astype(np.float16)
-                    })
-                    layer_names.append(name)
+            # First pass: only collect matching datasets, no data is read yet
+            def collect_weights(name, obj):
+                if isinstance(obj, h5py.Dataset) and ('kernel' in name or 'bias' in name):
+                    datasets.append((name, obj))
 
-            f.visititems(traverse_weights)
+            f.visititems(collect_weights)
+
+            # Second pass: bulk read and cast each weight once
+            for name, dataset in datasets:
+                weights.append({
+                    'name': name,
+                    'shape': dataset.shape,
+                    'data': dataset[()].astype(np.float16, copy=False)
+                })
 
         print(f"[INFO] Extracted {len(weights)} weight arrays")
         return weights
@@ -138,12 +194,13 @@ def create_simple_gguf_safe(model_path, output_path, model_info):
     print(f"[INFO] Creating GGUF from {model_path} to {output_path}")
 
     try:
-        with open(output_path, 'wb') as f:
+        # Large buffer coalesces the many small header writes into few syscalls
+        with open(output_path, 'wb', buffering=1 << 20) as f:
             # GGUF header
             f.write(b'GGUF')  # Magic number
-            f.write(struct.pack('<I', 3))  # Version
-            f.write(struct.pack('<I', 0))  # Tensor count (placeholder)
-            f.write(struct.pack('<I', 5))  # KV count
+            f.write(U32.pack(3))  # Version
+            f.write(U32.pack(0))  # Tensor count (placeholder)
+            f.write(U32.pack(5))  # KV count
 
             # Write metadata
             metadata_items = [
@@ -157,9 +214,9 @@ def create_simple_gguf_safe(model_path, output_path, model_info):
             for key, value in metadata_items:
                 key_bytes = key.encode('utf-8')
                 value_bytes = value.encode('utf-8')
-                f.write(struct.pack('<I', len(key_bytes)))
+                f.write(U32.pack(len(key_bytes)))
                 f.write(key_bytes)
-                f.write(struct.pack('<I', len(value_bytes)))
+                f.write(U32.pack(len(value_bytes)))
                 f.write(value_bytes)
 
             # Extract weights using h5py directly
@@ -169,7 +226,7 @@ def create_simple_gguf_safe(model_path, output_path, model_info):
                 print(f"[ERROR] No weights extracted, creating minimal GGUF")
                 # Create minimal GGUF with just metadata
                 f.seek(8)
-                f.write(struct.pack('<I', 0))  # Zero tensors
+                f.write(U32.pack(0))  # Zero tensors
             else:
                 # Write weights
                 weight_count = 0
@@ -177,32 +234,28 @@ def create_simple_gguf_safe(model_path, output_path, model_info):
 
                 for weight in weights:
                     weight_count += 1
-                    weight_data = weight['data']
+                    weight_data = np.ascontiguousarray(weight['data'])
 
-                    # Write weight name
+                    # Tensor header in a single write:
+                    # name length, name, rank, dims, data type (float16 = 1), data size
                     name_bytes = weight['name'].encode('utf-8')
-                    f.write(struct.pack('<I', len(name_bytes)))
-                    f.write(name_bytes)
-
-                    # Write shape
                     shape = weight_data.shape
-                    f.write(struct.pack('<I', len(shape)))
-                    for dim in shape:
-                        f.write(struct.pack('<I', dim))
-
-                    # Write data type (float16 = 1)
-                    f.write(struct.pack('<I', 1))
+                    nbytes = weight_data.nbytes
+                    f.write(b''.join((
+                        U32.pack(len(name_bytes)), name_bytes,
+                        U32.pack(len(shape)), *map(U32.pack, shape),
+                        U32.pack(1), U64.pack(nbytes)
+                    )))
 
-                    # Write data
-                    data_bytes = weight_data.tobytes()
-                    f.write(struct.pack('<Q', len(data_bytes)))
-                    f.write(data_bytes)
+                    # Write data straight from the array buffer (no bytes copy)
+                    f.write(weight_data.data)
 
-                    total_size += len(data_bytes)
+                    total_size += nbytes
 
                 # Go back and update tensor count
                 f.seek(8)  # Position after magic and version
-                f.write(struct.pack('<I', weight_count))
+                f.write(U32.pack(weight_count))
+                f.flush()
 
                 file_size = os.path.getsize(output_path)
                 print(f"[OK] GGUF conversion completed!")
@@ -89,9 +89,8 @@ const App: React.FC = () => {
               // 2. Connect WebSocket
               const socket = new WebSocket(`ws://${window.location.host}/ws/logs`);
               socket.onopen = () => console.log("WebSocket connected");
-              socket.onmessage = (event) => {
-                  const log = JSON.parse(event.data);
-
+              // Frames carry a JSON array of log entries (a burst is batched into one frame)
+              const handleLog = (log: LogMessage) => {
                   // Handle Metrics (Structured JSON from EvolutionService)
                   if (log.message.includes('[METRIC]')) {
                       try {
@@ -135,6 +134,10 @@ const App: React.FC = () => {
                   // Standard Logging
                   setLogs(prev => [...prev.slice(-99), log]);
               };
+              socket.onmessage = (event) => {
+                  const payload = JSON.parse(event.data);
+                  (Array.isArray(payload) ? payload : [payload]).forEach(handleLog);
+              };
               socket.onerror = () => {
                   console.log("WebSocket error");
                   setStatus(prev => ({ ...prev, backend_connection: false }));
@@ -1,7 +1,9 @@
 
 import json
 import os
+import re
 import time
+from collections import deque
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import database
@@ -10,7 +12,7 @@ import database
 
 class ContextManager:
     def __init__(self):
-        self.short_term_memory = []
+        self.short_term_memory = deque(maxlen=10)
 
     def embed_interaction(self, user_input: str, system_response: str, success: bool):
         """
@@ -20,13 +22,12 @@ class ContextManager:
             "timestamp": datetime.now().isoformat(),
             "prompt": user_input,
             "completion": system_response,
-            "success": success
+            "success": success,
+            "_text": user_input.lower()
         }
 
-        # 1. Update Short Term (RAM)
+        # 1. Update Short Term (RAM) - deque evicts the oldest entry itself
         self.short_term_memory.append(entry)
-        if len(self.short_term_memory) > 10:
-            self.short_term_memory.pop(0)
 
         # 2. Update Long Term (DB)
         database.add_history_item(user_input, system_response, success, meta={"source": "agent_core"})
@@ -36,11 +37,15 @@ class ContextManager:
         Simple retrieval from DB (Recent items) + Short Term RAM
         """
         relevant = []
+        query_words = set(re.findall(r"\w+", query.lower()))
 
-        # Check RAM first
+        # Check RAM first (prompts are lowercased once at insertion time; substring
+        # match on punctuation-stripped words, so "log" and "logs?" still recall "logs")
         for item in reversed(self.short_term_memory):
-            if any(word in item['prompt'].lower() for word in query.lower().split()):
+            if any(word in item['_text'] for word in query_words):
                 relevant.append(f"Recent Action: {item['completion']} (Result: {'Success' if item['success'] else 'Fail'})")
+                if len(relevant) == 3:
+                    break
 
         # If not enough, could check DB (simplified here to just RAM for speed in this logic)
         return relevant[:3]
@@ -65,11 +70,15 @@ class ToolRegistry:
 
 # --- 3. The Evolution Engine (Training) ---
 
+# Fixed chat-format schema for RLHF samples; only the contents need JSON escaping
+RLHF_SAMPLE_TEMPLATE = '{"messages":[{"role":"user","content":%s},{"role":"assistant","content":%s}]}\n'
+
 class ModelTrainer:
     def __init__(self):
         self.dataset_path = "training_data/finetune_dataset.jsonl"
         os.makedirs("training_data", exist_ok=True)
         self.collection_buffer = []
+        self._dataset_file = None
 
     def collect_feedback(self, prompt: str, action: str, rating: int):
         """
@@ -81,8 +90,10 @@ class ModelTrainer:
                 {"role": "assistant", "content": action}
             ]}
 
-            with open(self.dataset_path, "a") as f:
-                f.write(json.dumps(data) + "\n")
+            # Lines are buffered and only hit disk in batches (see flush)
+            if self._dataset_file is None:
+                self._dataset_file = open(self.dataset_path, "a", buffering=1 << 16)
+            self._dataset_file.write(RLHF_SAMPLE_TEMPLATE % (json.dumps(prompt), json.dumps(action)))
 
             self.collection_buffer.append(data)
 
@@ -94,11 +105,42 @@ class ModelTrainer:
         """
         Simulates kicking off a LoRA fine-tuning job on the local GPU.
         """
+        self.flush()
         print(f"[Self-Training] Threshold reached. Starting background fine-tuning on {len(self.collection_buffer)} new examples...")
         self.collection_buffer = [] # Reset buffer
 
+    def flush(self):
+        """
+        Persists any buffered RLHF samples to the dataset file.
+        """
+        if self._dataset_file is not None:
+            self._dataset_file.flush()
+            os.fsync(self._dataset_file.fileno())
+
 # --- 4. The Agent Brain (Orchestrator) ---
 
+# Intent routing, compiled once. Each branch is anchored at the start and
+# uses lookaheads so alternation order preserves the rule priority
+# (navigation > training start > analysis) regardless of word position.
+INTENT_ROUTER = re.compile(
+    r"^(?=.*?(?P<navigate>navigate|go to))"
+    r"|^(?=.*?train)(?=.*?(?P<train>start))"
+    r"|^(?=.*?(?P<analyze>analyze|think))",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Navigation keywords in descending priority -> dashboard route
+NAV_TARGETS = (
+    ("train", "autotrain"),
+    ("memory", "memory"),
+    ("chat", "chat"),
+    ("log", "logs"),
+    ("config", "config"),
+)
+NAV_KEYWORDS = re.compile(
+    "(?=(%s))" % "|".join(keyword for keyword, _ in NAV_TARGETS), re.IGNORECASE
+)
+
 class CoreAgentSystem:
     def __init__(self):
         self.context_manager = ContextManager()
@@ -125,15 +167,12 @@ class CoreAgentSystem:
         response_text = ""
 
         # --- Rule-Based Routing ---
-        lower_q = user_query.lower()
+        match = INTENT_ROUTER.search(user_query)
+        intent = match.lastgroup if match else None
 
-        if "navigate" in lower_q or "go to" in lower_q:
-            target = "dashboard"
-            if "config" in lower_q: target = "config"
-            if "log" in lower_q: target = "logs"
-            if "chat" in lower_q: target = "chat"
-            if "memory" in lower_q: target = "memory"
-            if "train" in lower_q: target = "autotrain"
+        if intent == "navigate":
+            found = {keyword.lower() for keyword in NAV_KEYWORDS.findall(user_query)}
+            target = next((route for keyword, route in NAV_TARGETS if keyword in found), "dashboard")
 
             thoughts.append(f"Decision: User wants to change view to {target}.")
             action = {
@@ -143,7 +182,7 @@ class CoreAgentSystem:
             }
             response_text = f"Navigating to {target}..."
 
-        elif "train" in lower_q and "start" in lower_q:
+        elif intent == "train":
             thoughts.append("Decision: Initiating training sequence via tool.")
             action = {
                 "tool": "terminalTool",
@@ -152,7 +191,7 @@ class CoreAgentSystem:
             }
             response_text = "Launching training subprocess..."
 
-        elif "analyze" in lower_q or "think" in lower_q:
+        elif intent == "analyze":
              thoughts.append("Action: Performing deep state analysis.")
              response_text = f"I've analyzed the current configuration for {app_state.get('activeConfig', {}).get('model_name')}. The learning rate seems optimal."
 
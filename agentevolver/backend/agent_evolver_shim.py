@@ -1,11 +1,18 @@
 
 import sys
 import argparse
+import random
 import yaml
 import time
 import os
 import json
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # This Shim bridges the Dashboard (which calls this script)
 # with the installed `agent_evolver` library.
 
@@ -20,7 +27,7 @@ def main():
     # 1. Load Config
     try:
         with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=SafeLoader)
     except Exception as e:
         print(f"[ERROR] Failed to load YAML config: {e}")
         sys.exit(1)
@@ -54,21 +61,30 @@ def run_fallback_simulation(config):
     If the real library isn't installed or crashes, we run this
     so the dashboard still shows activity (Mock Mode).
     """
+    # Line-buffered so the dashboard parser sees each line as soon as it's printed
+    sys.stdout.reconfigure(line_buffering=True)
+
+    # Output is not paced by default; set SHIM_PACE=1 for the old slow-motion demo
+    pace = bool(os.environ.get("SHIM_PACE"))
+
     print(f"--- ModelScope AgentEvolver (SIMULATION) ---")
     gens = int(config.get("evolution", {}).get("generations", 5))
     pop_size = int(config.get("evolution", {}).get("population_size", 10))
 
     print(f"[INFO] Initializing population of {pop_size} agents...")
-    time.sleep(1)
+    if pace:
+        time.sleep(1)
 
-    import random
+    uniform = random.uniform
     current_best = 0.2
 
     for g in range(1, gens + 1):
         print(f"\n--- Starting Generation {g} ---")
-        for i in range(1, pop_size + 1):
-            time.sleep(0.05)
-            score = min(0.99, current_best + random.uniform(-0.1, 0.15))
+        # Draw the whole population's scores up front for this generation
+        scores = [min(0.99, current_best + uniform(-0.1, 0.15)) for _ in range(pop_size)]
+        for i, score in enumerate(scores, 1):
+            if pace:
+                time.sleep(0.05)
             # Output format specifically for dashboard regex parser
             print(f"Evaluating Agent {i}/{pop_size}... Score: {score:.4f}")
 
@@ -78,7 +94,8 @@ def run_fallback_simulation(config):
 
         # CRITICAL: This matches the regex in evolution_service.py
         print(f"Generation [{g}/{gens}]: Avg Reward: {avg_reward:.4f}, Best Reward: {best_reward:.4f}")
-        time.sleep(1)
+        if pace:
+            time.sleep(1)
 
     print("\n[INFO] Optimization Finished.")
     output_dir = config.get('training', {}).get('output_dir', 'outputs')
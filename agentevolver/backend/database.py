@@ -1,96 +1,247 @@
 
+import asyncio
+import logging
 import sqlite3
-import json
+import orjson
 import os
-from typing import Dict, Any, List, Optional
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+logger = logging.getLogger("Database")
+
 DB_PATH = os.environ.get("DB_PATH", "agent_evolver.db")
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Applied once per connection instead of relying on SQLite's defaults
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Statements are kept as fixed module-level text so every call hits the
+# per-connection prepared statement cache instead of re-parsing the SQL
+SAVE_CONFIG_SQL = 'INSERT OR REPLACE INTO configurations (key, value, updated_at) VALUES (?, ?, ?)'
+LOAD_CONFIG_SQL = 'SELECT value FROM configurations WHERE key = ?'
+INSERT_HISTORY_SQL = 'INSERT INTO history (timestamp, prompt, completion, success, meta) VALUES (?, ?, ?, ?, ?)'
+RECENT_HISTORY_SQL = 'SELECT id, timestamp, prompt, completion, success, meta FROM history ORDER BY id DESC LIMIT ?'
+
+class ConnectionPool:
+    """
+    Process-wide SQLite pool: one writer (serialized by a lock, matching
+    SQLite's single-writer model) and up to `readers` reader connections
+    that WAL mode allows to run concurrently with the writer.
+    """
+
+    def __init__(self, db_path: str, readers: Optional[int] = None):
+        self.db_path = db_path
+        self.max_readers = readers or os.cpu_count() or 4
+        self._readers: queue.Queue = queue.Queue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are handed between threads (asyncio.to_thread), access is
+        # serialized by the pool itself
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                create = self._reader_count < self.max_readers
+                if create:
+                    self._reader_count += 1
+            if not create:
+                conn = self._readers.get()
+            else:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    # Give the slot back, or failed connects would exhaust the pool
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """Yields the writer connection inside a BEGIN IMMEDIATE transaction."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+pool = ConnectionPool(DB_PATH)
 
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Configuration Table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS configurations (
-        key TEXT PRIMARY KEY,
-        value TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-
-    # History/Memory Table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        prompt TEXT,
-        completion TEXT,
-        success BOOLEAN,
-        meta TEXT
-    )
-    ''')
-
-    # Training Jobs Table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS training_jobs (
-        id TEXT PRIMARY KEY,
-        status TEXT,
-        config TEXT,
-        metrics TEXT,
-        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
+    with pool.writer() as conn:
+        cursor = conn.cursor()
+
+        # Configuration Table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS configurations (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+        # History/Memory Table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            prompt TEXT,
+            completion TEXT,
+            success BOOLEAN,
+            meta TEXT
+        )
+        ''')
+
+        # Index recent successful interactions and time-range lookups
+        cursor.execute('CREATE INDEX IF NOT EXISTS history_success_idx ON history(id DESC) WHERE success = 1')
+        cursor.execute('CREATE INDEX IF NOT EXISTS history_ts_idx ON history(timestamp)')
+
+        # Training Jobs Table
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS training_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            config TEXT,
+            metrics TEXT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+        # Refresh planner statistics so the indexes above are used
+        cursor.execute('ANALYZE')
 
 # --- Config Operations ---
 
+CONFIG_CACHE_TTL = 5.0
+# key -> (monotonic expiry, parsed value) for load_config_cached
+_config_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
 def save_config(key: str, config_dict: Dict[str, Any]):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT OR REPLACE INTO configurations (key, value, updated_at) VALUES (?, ?, ?)',
-        (key, json.dumps(config_dict), datetime.now())
-    )
-    conn.commit()
-    conn.close()
+    with pool.writer() as conn:
+        conn.execute(
+            SAVE_CONFIG_SQL,
+            (key, orjson.dumps(config_dict).decode(), datetime.now())
+        )
+    _config_cache.pop(key, None)
 
 def load_config(key: str) -> Optional[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT value FROM configurations WHERE key = ?', (key,))
-    row = cursor.fetchone()
-    conn.close()
+    with pool.reader() as conn:
+        row = conn.execute(LOAD_CONFIG_SQL, (key,)).fetchone()
 
     if row:
-        return json.loads(row['value'])
+        return orjson.loads(row[0])
     return None
 
+def load_config_cached(key: str, ttl: float = CONFIG_CACHE_TTL) -> Optional[Dict[str, Any]]:
+    """
+    load_config with a short in-process TTL for hot read-only lookups.
+    The returned dict is shared, callers must not mutate it.
+    """
+    now = time.monotonic()
+    cached = _config_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    value = load_config(key)
+    _config_cache[key] = (now + ttl, value)
+    return value
+
 # --- History Operations ---
+# While the server runs, history rows are queued by request handlers and written
+# in batches by a single background task (flush_history), one transaction per
+# batch. The queue belongs to the loop that started the writer and is dropped
+# on shutdown; without a writer, rows are written directly.
+
+HISTORY_BATCH_SIZE = 500
+_history_queue: Optional[asyncio.Queue] = None
 
 def add_history_item(prompt: str, completion: str, success: bool, meta: Dict[str, Any] = {}):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO history (timestamp, prompt, completion, success, meta) VALUES (?, ?, ?, ?, ?)',
-        (datetime.now().isoformat(), prompt, completion, success, json.dumps(meta))
-    )
-    conn.commit()
-    conn.close()
+    row = (prompt, completion, success, orjson.dumps(meta).decode())
+    if _history_queue is None:
+        _write_history([row])
+    else:
+        _history_queue.put_nowait(row)
+
+def _write_history(rows: List[tuple]):
+    # One timestamp per batch: the writer drains as soon as rows arrive, so a
+    # batch only spans the moments it took to queue it
+    timestamp = datetime.now().isoformat()
+    with pool.writer() as conn:
+        conn.executemany(
+            INSERT_HISTORY_SQL,
+            [(timestamp, *row) for row in rows]
+        )
+
+def _drain_history(history_queue: asyncio.Queue, rows: List[tuple]) -> List[tuple]:
+    while len(rows) < HISTORY_BATCH_SIZE:
+        try:
+            rows.append(history_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return rows
+
+def start_history_writer() -> asyncio.Task:
+    """Creates a fresh history queue on the running loop and starts its writer task."""
+    global _history_queue
+    _history_queue = asyncio.Queue()
+    return asyncio.create_task(flush_history(_history_queue))
+
+async def flush_history(history_queue: asyncio.Queue):
+    """Background writer: waits for queued history rows and inserts them in batches."""
+    while True:
+        rows = _drain_history(history_queue, [await history_queue.get()])
+        try:
+            await asyncio.to_thread(_write_history, rows)
+        except Exception as e:
+            # Keep the writer alive (e.g. "database is locked"); this batch is lost
+            logger.error(f"Failed to write {len(rows)} history rows: {e}")
+
+def flush_pending_history():
+    """Detaches the queue and synchronously writes whatever is left (used on shutdown)."""
+    global _history_queue
+    history_queue, _history_queue = _history_queue, None
+    if history_queue is None:
+        return
+    while not history_queue.empty():
+        _write_history(_drain_history(history_queue, []))
+
+HISTORY_COLUMNS = ("id", "timestamp", "prompt", "completion", "success", "meta")
 
 def get_recent_history(limit: int = 10) -> List[Dict[str, Any]]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM history ORDER BY id DESC LIMIT ?', (limit,))
-    rows = cursor.fetchall()
-    conn.close()
+    # Plain tuples from SQLite, turned into dicts in a single pass
+    with pool.reader() as conn:
+        rows = conn.execute(RECENT_HISTORY_SQL, (limit,)).fetchall()
 
-    return [dict(row) for row in rows]
+    return [dict(zip(HISTORY_COLUMNS, row)) for row in rows]
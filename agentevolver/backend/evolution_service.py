@@ -1,20 +1,90 @@
 
 import os
+import hashlib
 import yaml
-import json
-import subprocess
+import orjson
 import asyncio
 import re
 import logging
-from typing import Dict, Any, AsyncGenerator
+import sys
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Any, AsyncGenerator, Tuple
 
 logger = logging.getLogger("EvolutionService")
 
+# Prefer the libyaml-backed emitter when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+# Regex pattern to parse AgentEvolver logs, compiled once for every stdout line
+# Example Log: "Generation [1/5]: Avg Reward: 0.45, Best Reward: 0.8"
+# Matches the raw stdout bytes so metric parsing never needs a decoded str
+METRIC_PATTERN = re.compile(rb"Generation\s*\[(\d+)/(\d+)\]:.*Avg Reward:\s*([\d\.]+).*Best Reward:\s*([\d\.]+)")
+
+class LogKind(IntEnum):
+    """Routing tag for log events, so consumers never re-parse message prefixes."""
+    STDOUT = 0
+    METRIC = 1   # payload is orjson-encoded MetricFrame bytes
+    SYSTEM = 2
+    ERROR = 3
+    EXTERNAL = 4
+
+LogEvent = Tuple[LogKind, Any]
+
+@dataclass
+class MetricFrame:
+    """Fixed-shape chart point; orjson serializes dataclasses natively."""
+    # Hand-written slots (dataclass(slots=True) needs Python 3.10+)
+    __slots__ = ("step", "reward", "success_rate", "loss")
+    step: int
+    reward: float
+    success_rate: float
+    loss: float
+
+STDOUT_CHUNK_SIZE = 64 * 1024
+
+async def iter_stdout_lines(stream: asyncio.StreamReader) -> AsyncGenerator[bytes, None]:
+    """
+    Yields lines (without the newline) from a subprocess pipe, reading it in
+    large chunks so a flood of output costs one await per chunk, not per line.
+    """
+    buf = bytearray()
+    while True:
+        chunk = await stream.read(STDOUT_CHUNK_SIZE)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            yield bytes(buf[start:nl])
+            start = nl + 1
+        del buf[:start]
+    if buf:
+        yield bytes(buf)
+
 class EvolutionService:
     def __init__(self, workspace_dir: str = "workspace"):
         self.workspace_dir = workspace_dir
         os.makedirs(self.workspace_dir, exist_ok=True)
         self.process = None
+        self._last_config_digest = None
+        # Background task consuming run_evolution (set by the server)
+        self.runner_task = None
+
+        # Resolve the runner once: the current interpreter (no PATH search) and
+        # whether the real shim is installed or the simulation script is used.
+        # In a real setup, this might be `python -m agent_evolver.start --config ...`
+        self._python = sys.executable
+        self._use_shim = os.path.exists("agent_evolver_shim.py")
+        if self._use_shim:
+            self._cmd_prefix = [self._python, "-u", "-m", "agent_evolver_shim"]
+        else:
+            # If the user hasn't installed the real library, we run a simulation
+            # that outputs EXACTLY the format we expect from the real library
+            self._cmd_prefix = [self._python, "-u", "backend/mock_evolver_cli.py"]
 
     def generate_yaml_config(self, config: Dict[str, Any]) -> str:
         """
@@ -44,85 +114,87 @@ class EvolutionService:
         }
 
         yaml_path = os.path.join(self.workspace_dir, "config.yaml")
+
+        # Skip re-emitting the file when the config hasn't changed since the last run
+        digest = hashlib.blake2b(
+            orjson.dumps(evolver_config, option=orjson.OPT_SORT_KEYS), digest_size=16
+        ).digest()
+        if digest == self._last_config_digest and os.path.exists(yaml_path):
+            return yaml_path
+
         with open(yaml_path, 'w') as f:
-            yaml.dump(evolver_config, f, default_flow_style=False)
+            yaml.dump(evolver_config, f, Dumper=SafeDumper, default_flow_style=False)
+        self._last_config_digest = digest
 
         return yaml_path
 
-    async def run_evolution(self, config: Dict[str, Any]) -> AsyncGenerator[str, None]:
+    async def run_evolution(self, config: Dict[str, Any]) -> AsyncGenerator[LogEvent, None]:
         """
-        Runs the AgentEvolver CLI/Script and yields parsed logs.
+        Runs the AgentEvolver CLI/Script and yields (LogKind, payload) events.
         """
         yaml_path = self.generate_yaml_config(config)
 
-        # Command to run AgentEvolver.
-        # In a real setup, this might be `python -m agent_evolver.start --config ...`
-        # Here we construct a command that mimics the library execution
-        cmd = ["python", "-u", "-m", "agent_evolver_shim", "--config", yaml_path]
-
-        # Check if the shim exists, if not, use the fallback simulation script
-        if not os.path.exists("agent_evolver_shim.py"):
-            # If the user hasn't installed the real library, we run a simulation
-            # that outputs EXACTLY the format we expect from the real library
-            cmd = ["python", "-u", "backend/mock_evolver_cli.py", yaml_path]
+        # Command to run AgentEvolver (runner resolved in __init__)
+        cmd = self._cmd_prefix + (["--config", yaml_path] if self._use_shim else [yaml_path])
 
         env = os.environ.copy()
         if config.get("api_key"):
             env["OPENAI_API_KEY"] = config["api_key"]
 
-        self.process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+        self.process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
             cwd=os.getcwd(), # Ensure we run from root
-            env=env,
-            bufsize=1
+            env=env
         )
 
-        # Regex patterns to parse AgentEvolver logs
-        # Example Log: "Generation [1/5]: Avg Reward: 0.45, Best Reward: 0.8"
-        metric_pattern = re.compile(r"Generation\s*\[(\d+)/(\d+)\]:.*Avg Reward:\s*([\d\.]+).*Best Reward:\s*([\d\.]+)")
-
-        # Stream output
-        while True:
-            # Run in executor to prevent blocking the async loop
-            line = await asyncio.to_thread(self.process.stdout.readline)
-            if not line and self.process.poll() is not None:
-                break
-
-            if line:
-                decoded_line = line.decode('utf-8').strip()
-
-                # 1. Yield the raw log for the console
-                yield f"[STDOUT] {decoded_line}"
-
-                # 2. Parse for metrics
-                match = metric_pattern.search(decoded_line)
-                if match:
-                    gen, total_gen, avg_rew, best_rew = match.groups()
-                    # Calculate a 'step' for the chart based on generation
-                    step = int(gen) * 10
-
-                    # Yield a special JSON formatted string for the frontend to intercept
-                    metric_payload = json.dumps({
-                        "step": step,
-                        "reward": float(avg_rew),
-                        "success_rate": float(best_rew), # Proxying best reward as success for viz
-                        "loss": 1.0 - float(avg_rew)
-                    })
-                    yield f"[METRIC_JSON] {metric_payload}"
-
-        return_code = self.process.poll()
+        # Stream output straight off the pipe on the event loop
+        async for line in iter_stdout_lines(self.process.stdout):
+            # 1. Yield the raw log for the console (the only decode per line)
+            yield LogKind.STDOUT, line.strip().decode('utf-8', errors='replace')
+
+            # 2. Parse for metrics (cheap substring check skips the regex for most lines)
+            match = METRIC_PATTERN.search(line) if b"Generation" in line else None
+            if match:
+                # int()/float() accept the matched bytes directly
+                gen, total_gen, avg_rew, best_rew = match.groups()
+                # Calculate a 'step' for the chart based on generation
+                step = int(gen) * 10
+
+                # Yield the encoded chart point for the frontend to intercept
+                reward = float(avg_rew)
+                yield LogKind.METRIC, orjson.dumps(MetricFrame(
+                    step=step,
+                    reward=reward,
+                    success_rate=float(best_rew), # Proxying best reward as success for viz
+                    loss=1.0 - reward
+                ))
+
+        return_code = await self.process.wait()
         if return_code == 0:
-            yield "[SYSTEM] Evolution process completed successfully."
-            yield "[SYSTEM] Best agent saved to workspace/outputs/best_agent.pt"
+            yield LogKind.SYSTEM, "Evolution process completed successfully."
+            yield LogKind.SYSTEM, "Best agent saved to workspace/outputs/best_agent.pt"
         else:
-            yield f"[ERROR] Evolution process failed with exit code {return_code}"
-
-    def stop(self):
-        if self.process:
+            yield LogKind.ERROR, f"Evolution process failed with exit code {return_code}"
+
+    def is_running(self) -> bool:
+        if self.runner_task is not None and not self.runner_task.done():
+            return True
+        return self.process is not None and self.process.returncode is None
+
+    async def stop(self):
+        # Settle the runner first: a stop issued right after start can land
+        # while it is still spawning, before self.process is set
+        if self.runner_task is not None and not self.runner_task.done():
+            self.runner_task.cancel()
+            try:
+                await self.runner_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self.process and self.process.returncode is None:
             self.process.terminate()
             try:
-                self.process.wait(timeout=5)
-            except:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
                 self.process.kill()
@@ -1,19 +1,21 @@
 
 import asyncio
+import itertools
 import os
 import logging
-import json
+import orjson
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect, Header, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import database
 
 # Import services
 from agent_core import CoreAgentSystem
-from evolution_service import EvolutionService
+from evolution_service import EvolutionService, LogKind, MetricFrame
 from webhook_service import WebhookService
 
 # Setup Logger
@@ -23,7 +25,7 @@ logger = logging.getLogger("AgentEvolverServer")
 # Initialize Database
 database.init_db()
 
-app = FastAPI(title="AgentEvolver Backend")
+app = FastAPI(title="AgentEvolver Backend", default_response_class=ORJSONResponse)
 
 # Initialize Systems
 agent_brain = CoreAgentSystem()
@@ -81,14 +83,52 @@ class ExternalJobRequest(BaseModel):
     config_overrides: Dict[str, Any]
 
 # --- Global State ---
-log_queue: asyncio.Queue = asyncio.Queue()
+# Every /ws/logs client gets its own bounded queue; producers broadcast to all
+LOG_SUBSCRIBER_QUEUE_SIZE = 1000
+log_subscribers: Set[asyncio.Queue] = set()
+# Per-process frame ids for /ws/logs (only need to be unique within the log stream)
+log_message_ids = itertools.count()
+
+# Console prefix shown by the dashboard for each kind, indexed by LogKind
+LOG_PREFIXES = ("[STDOUT] ", "[METRIC] ", "[SYSTEM] ", "[ERROR] ", "[EXTERNAL] ")
+
+def format_log_entry(kind: LogKind, payload: Any) -> Dict[str, Any]:
+    # Structured metrics arrive as encoded MetricFrame bytes
+    if kind == LogKind.METRIC:
+        return {
+            "timestamp": "now",
+            "level": "METRIC",
+            "message": LOG_PREFIXES[kind] + payload.decode(),
+            "id": next(log_message_ids)
+        }
+    return {
+        "timestamp": "now",
+        "level": "INFO",
+        "message": LOG_PREFIXES[kind] + payload,
+        "id": next(log_message_ids)
+    }
+
+def broadcast_log(kind: LogKind, payload: Any):
+    """Serializes a log event once and fans it out to every connected client."""
+    if not log_subscribers:
+        return
+    entry = orjson.dumps(format_log_entry(kind, payload))
+    for q in log_subscribers:
+        if q.full():
+            # Slow client: drop its oldest entry rather than block producers
+            q.get_nowait()
+        q.put_nowait(entry)
 
 # --- Dependencies ---
+# SQLite calls go through asyncio.to_thread so the pooled connections never
+# block the event loop.
 
-async def verify_service_key(x_service_key: str = Header(None)):
+def verify_service_key(x_service_key: str = Header(None)):
     """Validates that external apps are providing the correct key defined in DB."""
     # In a real app, load this from DB securely. For now, we allow any non-empty key if configured.
-    config = database.load_config("system_settings") or {}
+    # Cached with a short TTL (invalidated on save). A plain def so FastAPI runs it
+    # in the threadpool: a cache miss reads SQLite and may wait for a pooled reader
+    config = database.load_config_cached("system_settings") or {}
     expected_key = config.get("integration_service_key")
 
     if expected_key and x_service_key != expected_key:
@@ -97,14 +137,24 @@ async def verify_service_key(x_service_key: str = Header(None)):
 
 # --- Endpoints ---
 
+@app.on_event("startup")
+async def startup_event():
+    app.state.history_writer = database.start_history_writer()
+    # Serializes the check-and-start in /api/start (created here, on the serving loop)
+    app.state.start_lock = asyncio.Lock()
+
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.history_writer.cancel()
+    await evolution_service.stop()
+    database.flush_pending_history()
+    agent_brain.trainer.flush()
     await webhook_service.close()
 
 @app.get("/api/config")
 async def get_config():
     """Reads the current config from DB."""
-    config = database.load_config("current_training_config")
+    config = await asyncio.to_thread(database.load_config, "current_training_config")
     if not config:
         return {
             "model_name": "Qwen2.5-7B",
@@ -123,25 +173,30 @@ async def get_config():
 async def save_config(config: TrainingConfig):
     """Saves config to DB."""
     config_dict = config.model_dump()
-    database.save_config("current_training_config", config_dict)
+    await asyncio.to_thread(database.save_config, "current_training_config", config_dict)
     return {"status": "saved", "persistence": "sqlite"}
 
 @app.get("/api/settings/system")
 async def get_system_settings():
-    return database.load_config("system_settings") or {}
+    return (await asyncio.to_thread(database.load_config, "system_settings")) or {}
 
 @app.post("/api/settings/system")
 async def save_system_settings(settings: Dict[str, Any]):
-    database.save_config("system_settings", settings)
+    await asyncio.to_thread(database.save_config, "system_settings", settings)
     return {"status": "saved"}
 
 @app.post("/api/start")
 async def start_training(background_tasks: BackgroundTasks):
-    if evolution_service.process and evolution_service.process.poll() is None:
+    # Held until runner_task is set, so concurrent requests can't both start a run
+    async with app.state.start_lock:
+        return await _start_training(background_tasks)
+
+async def _start_training(background_tasks: BackgroundTasks):
+    if evolution_service.is_running():
         raise HTTPException(status_code=400, detail="Training already running")
 
     # Load from DB
-    config_data = database.load_config("current_training_config") or {}
+    config_data = (await asyncio.to_thread(database.load_config, "current_training_config")) or {}
 
     # Notify External App (Webhook)
     if config_data.get("external_api_url"):
@@ -155,11 +210,11 @@ async def start_training(background_tasks: BackgroundTasks):
 
     async def process_runner():
         try:
-            async for log_line in evolution_service.run_evolution(config_data):
-                await log_queue.put(log_line)
+            async for kind, payload in evolution_service.run_evolution(config_data):
+                broadcast_log(kind, payload)
 
                 # Check for completion to fire webhook
-                if "Evolution process completed" in log_line and config_data.get("external_api_url"):
+                if kind == LogKind.SYSTEM and payload.startswith("Evolution process completed") and config_data.get("external_api_url"):
                     await webhook_service.send_event(
                         config_data["external_api_url"],
                         config_data.get("external_api_token", ""),
@@ -168,19 +223,19 @@ async def start_training(background_tasks: BackgroundTasks):
                     )
 
         except Exception as e:
-            await log_queue.put(f"[ERROR] Exception in runner: {str(e)}")
+            broadcast_log(LogKind.ERROR, f"Exception in runner: {str(e)}")
             logger.error(e)
 
-    # Start background task
-    asyncio.create_task(process_runner())
+    # Start background task, keeping a handle so it can be cancelled (and so only one runs)
+    evolution_service.runner_task = asyncio.create_task(process_runner())
 
     return {"status": "started", "engine": "AgentEvolver Adapter"}
 
 @app.post("/api/stop")
 async def stop_training():
-    if evolution_service.process:
-        evolution_service.stop()
-        await log_queue.put("[SYSTEM] Process terminated by user.")
+    if evolution_service.is_running():
+        await evolution_service.stop()
+        broadcast_log(LogKind.SYSTEM, "Process terminated by user.")
         return {"status": "stopped"}
     return {"status": "no_process_running"}
 
@@ -201,15 +256,14 @@ async def ingest_telemetry(data: ExternalTelemetry):
     """
     # 1. Format for WebSocket clients
     if data.log_message:
-        await log_queue.put(f"[EXTERNAL] {data.log_message}")
+        broadcast_log(LogKind.EXTERNAL, data.log_message)
 
-    metric_payload = json.dumps({
-        "step": data.step,
-        "reward": data.reward,
-        "success_rate": data.metrics.get("success_rate", 0.0),
-        "loss": data.metrics.get("loss", 0.0)
-    })
-    await log_queue.put(f"[METRIC_JSON] {metric_payload}")
+    broadcast_log(LogKind.METRIC, orjson.dumps(MetricFrame(
+        step=data.step,
+        reward=data.reward,
+        success_rate=data.metrics.get("success_rate", 0.0),
+        loss=data.metrics.get("loss", 0.0)
+    )))
 
     return {"status": "accepted"}
 
@@ -218,15 +272,15 @@ async def trigger_job(request: ExternalJobRequest, background_tasks: BackgroundT
     """
     Allows external apps to programmatically start a training run.
     """
-    if evolution_service.process and evolution_service.process.poll() is None:
+    if evolution_service.is_running():
         raise HTTPException(status_code=409, detail="Busy")
 
     # Load default, apply overrides
-    config = database.load_config("current_training_config") or {}
+    config = (await asyncio.to_thread(database.load_config, "current_training_config")) or {}
     config.update(request.config_overrides)
 
     # Save back temporarily or just run (here we just run)
-    await log_queue.put(f"[SYSTEM] External Job Triggered: {request.task_id}")
+    broadcast_log(LogKind.SYSTEM, f"External Job Triggered: {request.task_id}")
 
     # Re-use logic (simplified for brevity, normally refactor start_training)
     # ... triggering logic similar to /start ...
@@ -253,28 +307,24 @@ async def agent_feedback(req: FeedbackRequest):
 @app.websocket("/ws/logs")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    q: asyncio.Queue = asyncio.Queue(maxsize=LOG_SUBSCRIBER_QUEUE_SIZE)
+    log_subscribers.add(q)
     try:
         while True:
-            line = await log_queue.get()
-
-            # Check if this is a structured metric from the EvolutionService
-            if line.startswith("[METRIC_JSON]"):
-                json_str = line.replace("[METRIC_JSON]", "").strip()
-                await websocket.send_json({
-                    "timestamp": "now",
-                    "level": "METRIC",
-                    "message": f"[METRIC] {json_str}",
-                    "id": os.urandom(4).hex()
-                })
-            else:
-                await websocket.send_json({
-                    "timestamp": "now",
-                    "level": "INFO",
-                    "message": line,
-                    "id": os.urandom(4).hex()
-                })
+            # Wait for one entry, then drain whatever else is already queued so a
+            # burst goes out as a single JSON array frame
+            batch = [await q.get()]
+            while True:
+                try:
+                    batch.append(q.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            await websocket.send_text((b"[" + b",".join(batch) + b"]").decode())
     except WebSocketDisconnect:
         logger.info("Client disconnected")
+    finally:
+        log_subscribers.discard(q)
 
 # Serve Frontend
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -1,7 +1,7 @@
 
 import aiohttp
 import logging
-import json
+import orjson
 from typing import Dict, Any
 
 logger = logging.getLogger("WebhookService")
@@ -12,7 +12,14 @@ class WebhookService:
 
     async def _get_session(self):
         if self.session is None:
-            self.session = aiohttp.ClientSession()
+            # Keep-alive connection pool so repeated events reuse TCP/TLS connections
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                keepalive_timeout=30,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
         return self.session
 
     async def send_event(self, url: str, secret: str, event_type: str, payload: Dict[str, Any]):
@@ -37,7 +44,7 @@ class WebhookService:
         }
 
         try:
-            async with session.post(url, json=body, headers=headers, timeout=5) as resp:
+            async with session.post(url, data=orjson.dumps(body), headers=headers, timeout=5) as resp:
                 if resp.status >= 400:
                     logger.warning(f"Webhook failed {resp.status}: {await resp.text()}")
                 else:
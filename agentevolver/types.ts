@@ -89,7 +89,7 @@ export interface MetricPoint {
 }
 
 export interface LogMessage {
-  id: string;
+  id: string | number;
   timestamp: string;
   level: 'INFO' | 'WARNING' | 'ERROR' | 'DEBUG' | 'HUMAN_FEEDBACK' | 'METRIC';
   message: string;
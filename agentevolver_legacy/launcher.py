@@ -109,9 +109,7 @@ class AgentEvolverLauncher:
 
         if os.path.exists(self.config_path):
             try:
-                import yaml
-                with open(self.config_path, 'r') as f:
-                    loaded_config = yaml.safe_load(f) or {}
+                loaded_config = self._read_config_file()
                 logger.info(f"Configuration loaded from {self.config_path}")
                 # Merge with defaults
                 default_config.update(loaded_config)
@@ -123,6 +121,39 @@ class AgentEvolverLauncher:
 
         return default_config
 
+    def _read_config_file(self) -> Dict[str, Any]:
+        """Parse the YAML config, reusing a JSON cache while the file is unchanged"""
+        st = os.stat(self.config_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        cache_path = f"{self.config_path}.cache.json"
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = json.load(f)
+            if isinstance(cached, dict) and cached.get("stamp") == stamp:
+                return cached["config"]
+        except (OSError, ValueError):
+            pass
+
+        import yaml
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(self.config_path, 'r') as f:
+            loaded_config = yaml.load(f, Loader=loader) or {}
+
+        try:
+            payload = json.dumps({"stamp": stamp, "config": loaded_config})
+            # JSON turns non-string keys into strings; only cache what round-trips
+            if json.loads(payload)["config"] == loaded_config:
+                with open(cache_path, 'w') as f:
+                    f.write(payload)
+            else:
+                logger.debug("Config cache not written: config does not round-trip through JSON")
+        except (OSError, TypeError, ValueError) as e:
+            # Unwritable directory or non-JSON YAML values: just skip the cache
+            logger.debug(f"Config cache not written: {e}")
+
+        return loaded_config
+
     def initialize_framework(self) -> bool:
         """Initialize the AgentEvolver framework"""
         logger.info("Initializing AgentEvolver framework...")
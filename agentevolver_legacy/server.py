@@ -9,15 +9,20 @@ It features continuous learning, prompt optimization, and performance tracking.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Dict, Any, Optional
+import os
 import time
 import json
 import uuid
+import sqlite3
+import orjson
 from datetime import datetime
 import logging
 import asyncio
+import threading
+from functools import lru_cache
 import uvicorn
 
 # Configure logging
@@ -28,7 +33,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AgentEvolver Server",
     description="Self-Evolving AI Backend for CannaAI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -71,14 +77,139 @@ class ConfigSettings(BaseModel):
     auto_optimization: bool = True
     risk_tolerance: str = "moderate"
 
-# In-memory storage (in production, use a proper database)
+# Prompt mutation rules, applied in order by AgentEvolverCore.optimize_prompt.
+# Each rule is (predicate, mutator, improvement, suggestion). Predicates see which
+# PROMPT_NEEDLES occur in the prompt (case-insensitively); the prompt is folded
+# once per request, and mutators return the text they introduced so only that
+# is scanned afterwards.
+PROMPT_NEEDLES = ("cannabis", "recommend")
+DOMAIN_PREFIX = "As a cannabis cultivation expert, "
+ACTIONABLE_SUFFIX = " Provide specific, actionable recommendations."
+
+def _add_domain_expertise(prompt: str, context: Dict[str, Any]):
+    return DOMAIN_PREFIX + prompt, DOMAIN_PREFIX
+
+def _add_strain_context(prompt: str, context: Dict[str, Any]):
+    if "this plant" not in prompt:
+        return prompt, ""
+    replacement = f"this {context.get('strain', 'unknown')} cannabis plant"
+    return prompt.replace("this plant", replacement), replacement
+
+def _add_symptom_focus(prompt: str, context: Dict[str, Any]):
+    addition = f" Focus on symptoms: {', '.join(context['symptoms'])}."
+    return prompt + addition, addition
+
+def _add_actionability(prompt: str, context: Dict[str, Any]):
+    return prompt + ACTIONABLE_SUFFIX, ACTIONABLE_SUFFIX
+
+# Suggestions are shared by reference across responses and must not be mutated
+SUGGESTION_DOMAIN = {
+    "type": "domain_expertise",
+    "description": "Added cannabis cultivation expertise context"
+}
+SUGGESTION_SYMPTOMS = {
+    "type": "symptom_detail",
+    "description": "Added specific symptom context"
+}
+SUGGESTION_ACTIONABLE = {
+    "type": "actionability",
+    "description": "Enhanced for actionable recommendations"
+}
+
+@lru_cache(maxsize=64)
+def strain_suggestion(strain: str) -> Dict[str, Any]:
+    return {
+        "type": "strain_specificity",
+        "description": f"Added {strain} strain-specific context"
+    }
+
+PROMPT_RULES = (
+    # Cannabis-specific optimizations
+    (
+        lambda present, context, task_type: not present["cannabis"],
+        _add_domain_expertise,
+        0.05,
+        lambda context: SUGGESTION_DOMAIN
+    ),
+    # Task-specific enhancements
+    (
+        lambda present, context, task_type: task_type == "analysis" and "strain" in context,
+        _add_strain_context,
+        0.03,
+        lambda context: strain_suggestion(f"{context.get('strain', 'unknown')}")
+    ),
+    # Symptom-specific enhancements
+    (
+        lambda present, context, task_type: bool(context.get("symptoms")),
+        _add_symptom_focus,
+        0.04,
+        lambda context: SUGGESTION_SYMPTOMS
+    ),
+    # Enhancement for actionable recommendations
+    (
+        lambda present, context, task_type: not present["recommend"],
+        _add_actionability,
+        0.02,
+        lambda context: SUGGESTION_ACTIONABLE
+    ),
+)
+
+def format_history_record(row_id: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a stored evolution record into its public /history shape"""
+    out = {
+        # UUID-shaped, derived from the row's primary key so it is unique across workers
+        "id": str(uuid.UUID(int=row_id)),
+        "timestamp": datetime.fromtimestamp(record["ts_ns"] / 1e9),
+    }
+    out.update(record)
+    del out["ts_ns"]
+    return out
+
+# Evolution history lives in SQLite (WAL) rather than on the heap, so it is
+# shared by every uvicorn worker; only the newest HISTORY_LIMIT rows are kept
+HISTORY_DB_PATH = os.environ.get("EVOLVER_DB_PATH", "evolver.db")
+HISTORY_LIMIT = 1000
+
+def open_history_db(path: str) -> sqlite3.Connection:
+    """Open (and create if needed) the evolution history store"""
+    # Shared across threadpool threads; AgentEvolverCore serializes access
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS evolution_history (
+            id INTEGER PRIMARY KEY,
+            ts_ns INTEGER NOT NULL,
+            payload BLOB NOT NULL
+        )
+    """)
+    return conn
+
+# In-memory metrics and config; history is persisted in SQLite
 class AgentEvolverCore:
     def __init__(self):
         self.metrics = PerformanceMetrics()
         self.config = ConfigSettings()
-        self.evolution_history = []
+        # Opened on first use, so importing the module doesn't create the database
+        self._history_db: Optional[sqlite3.Connection] = None
         self.custom_prompts = []
         self.start_time = time.time()
+        # Route handlers run in the threadpool, so in-memory state is mutated under
+        # this lock; it is never held across SQLite calls, which may wait on other
+        # workers for up to busy_timeout
+        self._lock = threading.Lock()
+        # Serializes use of the shared history connection
+        self._db_lock = threading.Lock()
+        # Serialized metrics, reused until the next optimization bumps the version
+        self._metrics_version = 0
+        self._metrics_cache: Optional[tuple] = None
+
+    def _history(self) -> sqlite3.Connection:
+        # Callers hold self._db_lock
+        if self._history_db is None:
+            self._history_db = open_history_db(HISTORY_DB_PATH)
+        return self._history_db
 
     def optimize_prompt(self, original_prompt: str, context: Dict[str, Any], task_type: str) -> EvolutionResult:
         """Optimize a prompt based on context and task type"""
@@ -87,66 +218,27 @@ class AgentEvolverCore:
         try:
             # Simulate prompt optimization logic
             optimized_prompt = original_prompt
+            folded_prompt = original_prompt.casefold()
+            present = {needle: needle in folded_prompt for needle in PROMPT_NEEDLES}
             improvement = 0.0
             suggestions = []
 
-            # Cannabis-specific optimizations
-            if "cannabis" not in original_prompt.lower():
-                optimized_prompt = f"As a cannabis cultivation expert, {optimized_prompt}"
-                improvement += 0.05
-                suggestions.append({
-                    "type": "domain_expertise",
-                    "description": "Added cannabis cultivation expertise context"
-                })
-
-            # Task-specific enhancements
-            if task_type == "analysis" and "strain" in context:
-                strain = context.get("strain", "unknown")
-                optimized_prompt = optimized_prompt.replace(
-                    "this plant",
-                    f"this {strain} cannabis plant"
-                )
-                improvement += 0.03
-                suggestions.append({
-                    "type": "strain_specificity",
-                    "description": f"Added {strain} strain-specific context"
-                })
-
-            # Symptom-specific enhancements
-            if "symptoms" in context and context["symptoms"]:
-                symptoms_text = ", ".join(context["symptoms"])
-                optimized_prompt += f" Focus on symptoms: {symptoms_text}."
-                improvement += 0.04
-                suggestions.append({
-                    "type": "symptom_detail",
-                    "description": "Added specific symptom context"
-                })
-
-            # Enhancement for actionable recommendations
-            if "recommend" not in optimized_prompt.lower():
-                optimized_prompt += " Provide specific, actionable recommendations."
-                improvement += 0.02
-                suggestions.append({
-                    "type": "actionability",
-                    "description": "Enhanced for actionable recommendations"
-                })
-
-            # Update metrics
-            self.metrics.total_optimizations += 1
-            self.metrics.successful_evolutions += 1
-            self.metrics.evolution_progress = min(self.metrics.evolution_progress + improvement, 1.0)
-
-            # Calculate average improvement
-            if self.metrics.successful_evolutions > 0:
-                total_improvement = self.metrics.average_improvement * (self.metrics.successful_evolutions - 1) + improvement
-                self.metrics.average_improvement = total_improvement / self.metrics.successful_evolutions
+            for applies, mutate, delta, suggest in PROMPT_RULES:
+                if applies(present, context, task_type):
+                    optimized_prompt, added = mutate(optimized_prompt, context)
+                    if added:
+                        folded_added = added.casefold()
+                        for needle in PROMPT_NEEDLES:
+                            present[needle] = present[needle] or needle in folded_added
+                    improvement += delta
+                    suggestions.append(suggest(context))
 
             processing_time = time.time() - start_time
 
-            # Store evolution record
+            # Store evolution record; the id comes from the row and the timestamp from ts_ns on read
+            ts_ns = time.time_ns()
             evolution_record = {
-                "id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
+                "ts_ns": ts_ns,
                 "original_prompt": original_prompt,
                 "optimized_prompt": optimized_prompt,
                 "improvement": improvement,
@@ -154,13 +246,35 @@ class AgentEvolverCore:
                 "context": context,
                 "processing_time": processing_time
             }
-            self.evolution_history.append(evolution_record)
+            payload = orjson.dumps(evolution_record)
+
+            # Persist first: if the write fails, the except path counts this
+            # request once, as a failure
+            with self._db_lock:
+                history_db = self._history()
+                cursor = history_db.execute(
+                    "INSERT INTO evolution_history (ts_ns, payload) VALUES (?, ?)",
+                    (ts_ns, payload)
+                )
+                # Keep only the newest HISTORY_LIMIT records
+                history_db.execute(
+                    "DELETE FROM evolution_history WHERE id <= ?",
+                    (cursor.lastrowid - HISTORY_LIMIT,)
+                )
 
-            # Keep only last 1000 records in memory
-            if len(self.evolution_history) > 1000:
-                self.evolution_history = self.evolution_history[-1000:]
+            with self._lock:
+                # Update metrics
+                self.metrics.total_optimizations += 1
+                self.metrics.successful_evolutions += 1
+                self.metrics.evolution_progress = min(self.metrics.evolution_progress + improvement, 1.0)
 
-            logger.info(f"Prompt optimized with improvement: {improvement:.3f}")
+                # Running mean of improvement over successful evolutions
+                self.metrics.average_improvement += (
+                    improvement - self.metrics.average_improvement
+                ) / self.metrics.successful_evolutions
+                self._metrics_version += 1
+
+            logger.info("Prompt optimized with improvement: %.3f", improvement)
 
             return EvolutionResult(
                 success=True,
@@ -172,9 +286,11 @@ class AgentEvolverCore:
             )
 
         except Exception as e:
-            logger.error(f"Prompt optimization failed: {str(e)}")
-            self.metrics.total_optimizations += 1
-            self.metrics.failed_evolutions += 1
+            logger.error("Prompt optimization failed: %s", e)
+            with self._lock:
+                self.metrics.total_optimizations += 1
+                self.metrics.failed_evolutions += 1
+                self._metrics_version += 1
 
             return EvolutionResult(
                 success=False,
@@ -185,15 +301,34 @@ class AgentEvolverCore:
         """Get current performance metrics"""
         return self.metrics
 
+    def get_metrics_dict(self) -> Dict[str, Any]:
+        """Get current performance metrics as a dict, cached between updates"""
+        with self._lock:
+            cached = self._metrics_cache
+            if cached is None or cached[0] != self._metrics_version:
+                cached = self._metrics_cache = (self._metrics_version, self.metrics.dict())
+            return cached[1]
+
     def get_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get evolution history"""
-        return self.evolution_history[-limit:]
+        with self._db_lock:
+            rows = self._history().execute(
+                "SELECT id, payload FROM evolution_history ORDER BY id DESC LIMIT ?",
+                (limit if limit > 0 else -1,)
+            ).fetchall()
+        # Oldest first, as before
+        return [format_history_record(row_id, orjson.loads(payload)) for row_id, payload in reversed(rows)]
+
+    def count_history(self) -> int:
+        """Get the number of stored evolution records"""
+        with self._db_lock:
+            return self._history().execute("SELECT COUNT(*) FROM evolution_history").fetchone()[0]
 
     def update_config(self, new_config: Dict[str, Any]):
-        """Update configuration"""
-        for key, value in new_config.items():
-            if hasattr(self.config, key):
-                setattr(self.config, key, value)
+        """Update configuration (raises ValidationError on bad values)"""
+        with self._lock:
+            # Validate the merged settings in one pass; unknown keys are ignored
+            self.config = ConfigSettings(**{**self.config.dict(), **new_config})
 
 # Initialize the core evolver
 evolver = AgentEvolverCore()
@@ -208,7 +343,7 @@ async def root():
         "service": "AgentEvolver Server",
         "version": "1.0.0",
         "uptime_seconds": uptime,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "capabilities": [
             "prompt_optimization",
             "performance_tracking",
@@ -218,19 +353,23 @@ async def root():
         ]
     }
 
+# The handlers below that touch the evolver are plain `def` so FastAPI runs them
+# in its threadpool instead of blocking the event loop on its locks or CPU work
 @app.get("/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "metrics": evolver.get_metrics().dict()
+        "timestamp": datetime.now(),
+        "metrics": evolver.get_metrics_dict()
     }
 
-@app.post("/optimize", response_model=EvolutionResult)
-async def optimize_prompt(request: PromptRequest):
+# /optimize and /metrics return ready-made responses; `responses` keeps the
+# OpenAPI schema without re-validating the body through a response_model
+@app.post("/optimize", responses={200: {"model": EvolutionResult}})
+def optimize_prompt(request: PromptRequest):
     """Optimize a prompt based on context and task type"""
-    logger.info(f"Received optimization request for task type: {request.task_type}")
+    logger.info("Received optimization request for task type: %s", request.task_type)
 
     result = evolver.optimize_prompt(
         original_prompt=request.prompt,
@@ -238,26 +377,29 @@ async def optimize_prompt(request: PromptRequest):
         task_type=request.task_type
     )
 
-    return result
+    return ORJSONResponse(content=result.dict())
 
-@app.get("/metrics", response_model=PerformanceMetrics)
-async def get_metrics():
+@app.get("/metrics", responses={200: {"model": PerformanceMetrics}})
+def get_metrics():
     """Get current performance metrics"""
-    return evolver.get_metrics()
+    return ORJSONResponse(content=evolver.get_metrics_dict())
 
 @app.get("/history")
-async def get_history(limit: int = 50):
+def get_history(limit: int = 50):
     """Get evolution history"""
-    return {"history": evolver.get_history(limit), "total_records": len(evolver.evolution_history)}
+    return {"history": evolver.get_history(limit), "total_records": evolver.count_history()}
 
 @app.post("/config")
-async def update_config(config: Dict[str, Any]):
+def update_config(config: Dict[str, Any]):
     """Update AgentEvolver configuration"""
-    evolver.update_config(config)
+    try:
+        evolver.update_config(config)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
     return {"success": True, "config": evolver.config.dict()}
 
 @app.get("/config")
-async def get_config():
+def get_config():
     """Get current configuration"""
     return evolver.config.dict()
 
@@ -265,12 +407,14 @@ async def get_config():
 async def submit_feedback(evolution_id: str, feedback: Dict[str, Any]):
     """Submit feedback for evolution results"""
     # In a real implementation, this would be used to improve the optimization algorithms
-    logger.info(f"Received feedback for evolution {evolution_id}: {feedback}")
+    logger.info("Received feedback for evolution %s: %s", evolution_id, feedback)
     return {"success": True, "message": "Feedback recorded successfully"}
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
+    if not logger.isEnabledFor(logging.INFO):
+        return
     logger.info("🤖 AgentEvolver Server Starting Up...")
     logger.info("🔬 Self-Evolving AI Capabilities Enabled:")
     logger.info("   • Self-questioning task generation")
@@ -286,10 +430,16 @@ async def shutdown_event():
 
 # Run the server
 if __name__ == "__main__":
+    # One worker process per core by default (WEB_CONCURRENCY overrides); RELOAD=1
+    # restores the single auto-reloading dev server. Metrics and config are
+    # per-process; evolution history is shared through the SQLite store.
+    reload = os.environ.get("RELOAD") == "1"
+    workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
     uvicorn.run(
         "server:app",
         host="0.0.0.0",
         port=8001,
-        reload=True,
+        workers=1 if reload else workers,
+        reload=reload,
         log_level="info"
     )
\ No newline at end of file
@@ -3,20 +3,36 @@
 Test client for AgentEvolver server
 """
 
-import requests
+import asyncio
+import httpx
 import json
 import time
 
-def test_agentevolver():
+async def test_agentevolver():
     """Test the AgentEvolver server functionality"""
     base_url = "http://localhost:8001"
 
     print("🤖 Testing AgentEvolver Server...")
     print("=" * 50)
 
+    # One pooled connection for every request below
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        return await run_checks(client)
+
+async def run_checks(client: httpx.AsyncClient):
+    """Run the server checks over a shared client"""
+    # Status and health are independent reads, so fetch them concurrently
+    status_response, health_response = await asyncio.gather(
+        client.get("/"),
+        client.get("/health"),
+        return_exceptions=True
+    )
+
     # Test 1: Server status
     try:
-        response = requests.get(f"{base_url}/")
+        response = status_response
+        if isinstance(response, Exception):
+            raise response
         if response.status_code == 200:
             data = response.json()
             print("✅ Server is running!")
@@ -32,7 +48,9 @@ def test_agentevolver():
 
     # Test 2: Health check
     try:
-        response = requests.get(f"{base_url}/health")
+        response = health_response
+        if isinstance(response, Exception):
+            raise response
         if response.status_code == 200:
             data = response.json()
             print("✅ Health check passed!")
@@ -57,8 +75,8 @@ def test_agentevolver():
         print(f"\n🔬 Testing prompt optimization...")
         print(f"Original prompt: {test_prompt}")
 
-        response = requests.post(
-            f"{base_url}/optimize",
+        response = await client.post(
+            "/optimize",
             json={
                 "prompt": test_prompt,
                 "context": test_context,
@@ -88,9 +106,9 @@ def test_agentevolver():
     except Exception as e:
         print(f"❌ Prompt optimization error: {str(e)}")
 
-    # Test 4: Get metrics
+    # Test 4: Get metrics (after /optimize, so the counters include it)
     try:
-        response = requests.get(f"{base_url}/metrics")
+        response = await client.get("/metrics")
         if response.status_code == 200:
             metrics = response.json()
             print("\n📊 Current Metrics:")
@@ -109,4 +127,4 @@ def test_agentevolver():
     return True
 
 if __name__ == "__main__":
-    test_agentevolver()
\ No newline at end of file
+    asyncio.run(test_agentevolver())
\ No newline at end of file
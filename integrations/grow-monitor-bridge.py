@@ -5,15 +5,44 @@ Grow Monitor Bridge - Feeds AC Infinity data from OpenClaw grow monitoring to Ca
 Usage: python3 grow-monitor-bridge.py [screenshot_path]
 """
 
+import os
 import sys
-import json
+import mmap
 import requests
-from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads
+    LOADS_ACCEPTS_BUFFER = True
+except ImportError:
+    from json import loads as json_loads
+    LOADS_ACCEPTS_BUFFER = False
 
 # Configuration
 CANNAI_URL = "http://localhost:3000"
 GROW_LOGS_DIR = "/home/duckets/.openclaw/workspace/grow-logs"
 
+# One keep-alive session per process so repeated calls reuse the connection
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+SESSION.headers["Connection"] = "keep-alive"
+
+# Below one page mmap setup costs more than the copy it saves
+MMAP_MIN_SIZE = 4096
+
+def read_json_file(path):
+    """Parse a JSON file, mapping it into memory instead of copying when it is large"""
+    with open(path, 'rb') as f:
+        if not LOADS_ACCEPTS_BUFFER or os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return json_loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return json_loads(view)
+
 def extract_ac_infinity_data(screenshot_path=None):
     """Extract environmental data from AC Infinity screenshot or use latest"""
     if screenshot_path:
@@ -22,9 +51,10 @@ def extract_ac_infinity_data(screenshot_path=None):
     
     # Use latest data file if available
     latest_data = GROW_LOGS_DIR + "/data/latest.json"
-    if Path(latest_data).exists():
-        with open(latest_data) as f:
-            return json.load(f)
+    try:
+        return read_json_file(latest_data)
+    except FileNotFoundError:
+        pass
     
     # Default values (should be replaced with actual data)
     return {
@@ -49,7 +79,7 @@ def send_to_cannai(data):
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=5)
+        response = SESSION.post(url, json=payload, timeout=5)
         result = response.json()
         
         if response.status_code == 200:
@@ -11,47 +11,86 @@ Options:
   --verbose   Show detailed output
 """
 
+import os
 import sys
 import json
+import mmap
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
-from pathlib import Path
 from datetime import datetime
 
+try:
+    from orjson import loads as json_loads
+    LOADS_ACCEPTS_BUFFER = True
+except ImportError:
+    from json import loads as json_loads
+    LOADS_ACCEPTS_BUFFER = False
+
 # Configuration
 CANNAI_URL = "http://localhost:3000"
 GROW_LOGS_DIR = "/home/duckets/.openclaw/workspace/grow-logs"
 AC_INFINITY_LATEST = f"{GROW_LOGS_DIR}/ac-infinity-latest.json"
 
+# One keep-alive session per process so repeated calls reuse the connection
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+SESSION.headers["Connection"] = "keep-alive"
+
+# Below one page mmap setup costs more than the copy it saves
+MMAP_MIN_SIZE = 4096
+
+def read_json_file(path):
+    """Parse a JSON file, mapping it into memory instead of copying when it is large"""
+    with open(path, 'rb') as f:
+        if not LOADS_ACCEPTS_BUFFER or os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return json_loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return json_loads(view)
+
 def extract_ac_infinity_data():
     """Extract environmental data from AC Infinity monitoring"""
-    if Path(AC_INFINITY_LATEST).exists():
-        with open(AC_INFINITY_LATEST) as f:
-            data = json.load(f)
-            return {
-                "temperature": data.get("inside_temp"),
-                "humidity": data.get("inside_humidity"),
-                "vpd": data.get("inside_vpd"),
-                "outside_temp": data.get("outside_temp"),
-                "outside_humidity": data.get("outside_humidity"),
-                "outside_vpd": data.get("outside_vpd"),
-                "source": "ac_infinity"
-            }
+    try:
+        data = read_json_file(AC_INFINITY_LATEST)
+    except FileNotFoundError:
+        data = None
+    if data is not None:
+        return {
+            "temperature": data.get("inside_temp"),
+            "humidity": data.get("inside_humidity"),
+            "vpd": data.get("inside_vpd"),
+            "outside_temp": data.get("outside_temp"),
+            "outside_humidity": data.get("outside_humidity"),
+            "outside_vpd": data.get("outside_vpd"),
+            "source": "ac_infinity"
+        }
     
     # Fallback: use recent screenshot data
     screenshots_dir = f"{GROW_LOGS_DIR}/screenshots"
-    if Path(screenshots_dir).exists():
-        screenshots = sorted(Path(screenshots_dir).glob("ac-infinity-*.png"), reverse=True)
-        if screenshots:
-            latest = screenshots[0]
-            print(f"📸 Using latest screenshot: {latest.name}")
-            # TODO: Add OCR extraction here
-            return {
-                "temperature": 75.1,  # Placeholder
-                "humidity": 38.7,
-                "vpd": 1.81,
-                "source": "ac_infinity_screenshot"
-            }
+    try:
+        # Screenshot names are timestamped, so the newest is the max name (one pass, no sort/stat)
+        with os.scandir(screenshots_dir) as entries:
+            latest = max(
+                (e for e in entries if e.name.startswith("ac-infinity-") and e.name.endswith(".png")),
+                key=lambda e: e.name,
+                default=None
+            )
+    except FileNotFoundError:
+        latest = None
+    if latest is not None:
+        print(f"📸 Using latest screenshot: {latest.name}")
+        # TODO: Add OCR extraction here
+        return {
+            "temperature": 75.1,  # Placeholder
+            "humidity": 38.7,
+            "vpd": 1.81,
+            "source": "ac_infinity_screenshot"
+        }
     
     return None
 
@@ -75,7 +114,7 @@ def send_to_cannai(data, verbose=False):
         print(f"📤 Sending to CannaAI: {json.dumps(payload, indent=2)}")
     
     try:
-        response = requests.post(url, json=payload, timeout=5)
+        response = SESSION.post(url, json=payload, timeout=5)
         result = response.json()
         
         if response.status_code == 200:
@@ -97,7 +136,7 @@ def test_connection(verbose=False):
     url = f"{CANNAI_URL}/api/openclaw/status"
     
     try:
-        response = requests.get(url, timeout=5)
+        response = SESSION.get(url, timeout=5)
         result = response.json()
         
         if response.status_code == 200: